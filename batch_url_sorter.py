@@ -1,5 +1,61 @@
 import os
-from collections import defaultdict
+import concurrent.futures
+from itertools import groupby
+from operator import itemgetter
+
+# Batch files are small and independent, so their writes are overlapped across threads.
+MAX_WRITE_WORKERS = 16
+# Write buffer for each batch file; large enough to hold a whole batch
+WRITE_BUFFER_SIZE = 1 << 17
+
+def split_into_batches(urls, min_batch_size, max_batch_size):
+    """
+    Yields consecutive chunks of a sorted URL list, keeping each chunk within the size limits.
+
+    The list is walked by index, so only the yielded chunks are copied.
+
+    Args:
+        urls (list): The sorted URLs to split.
+        min_batch_size (int): The smallest size a trailing chunk should have.
+        max_batch_size (int): The largest size any chunk may have.
+    """
+    start = 0
+    total = len(urls)
+
+    while start < total:
+        n = total - start
+
+        # If the remaining URLs fit in one batch, this is the last chunk
+        if n <= max_batch_size:
+            size = n
+        else:
+            # If the remainder after taking a max-sized chunk would be too small,
+            # we need to split the current amount more evenly.
+            remainder = n - max_batch_size
+            if 0 < remainder < min_batch_size:
+                # Split into two roughly equal halves instead of one large and one tiny chunk
+                size = (n // 2) + (n % 2) # Ensure it's ceiling division
+            else:
+                # It's safe to take a full-sized chunk
+                size = max_batch_size
+
+        yield urls[start:start + size]
+        start += size
+
+def write_batch_file(output_dir, batch_key, urls):
+    """
+    Writes one batch of URLs to '<output_dir>/<batch_key>.txt'.
+
+    Returns:
+        tuple: The output path and the number of URLs written.
+    """
+    filename = batch_key.replace('/', '_') + ".txt"
+    output_path = os.path.join(output_dir, filename)
+
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write('\n'.join(urls))
+
+    return output_path, len(urls)
 
 def batch_urls_by_directory(input_file, output_dir, base_prefix):
     """
@@ -21,16 +77,20 @@ def batch_urls_by_directory(input_file, output_dir, base_prefix):
     os.makedirs(output_dir, exist_ok=True)
     
     # Group URLs by their first-level directory for more substantial initial groups.
-    level_1_groups = defaultdict(list)
+    # Each entry is a (group_key, url) pair so all URLs can be sorted in one pass.
+    keyed_urls = []
     total_urls_read = 0
     unprocessed_urls = []
 
     print(f"Reading URLs from '{input_file}' and grouping by top-level directory...")
     with open(input_file, 'r', encoding='utf-8') as f:
-        all_lines = [line.strip() for line in f if line.strip()]
-        total_urls_read = len(all_lines)
+        # Classify each line as it is read instead of materializing the whole file first.
+        for line in f:
+            url = line.strip()
+            if not url:
+                continue
+            total_urls_read += 1
 
-        for url in all_lines:
             if url.startswith(base_prefix):
                 path_suffix = url[len(base_prefix):]
                 path_parts = path_suffix.split('/')
@@ -38,12 +98,15 @@ def batch_urls_by_directory(input_file, output_dir, base_prefix):
                 if len(path_parts) > 1:
                     # Group by the first directory name (e.g., "DataProductsandMarketplace")
                     group_key = path_parts[0]
-                    level_1_groups[group_key].append(url)
                 else:
-                    level_1_groups["root"].append(url)
+                    group_key = "root"
+                keyed_urls.append((group_key, url))
             else:
                 unprocessed_urls.append(url)
 
+    # Sort once by (group, url): every group becomes contiguous and is already in URL order.
+    keyed_urls.sort()
+
     processed_url_count = total_urls_read - len(unprocessed_urls)
     final_batches = {}
     all_leftover_urls = []
@@ -51,80 +114,44 @@ def batch_urls_by_directory(input_file, output_dir, base_prefix):
     print("Analyzing groups and creating evenly sized batches...")
 
     # Process each top-level directory group
-    for group_key, urls in level_1_groups.items():
+    for group_key, group in groupby(keyed_urls, key=itemgetter(0)):
+        urls = [url for _, url in group]
         if len(urls) < MIN_BATCH_SIZE:
             # If a whole group is too small, save its URLs for a combined misc batch
             all_leftover_urls.extend(urls)
             continue
         
         # This group is large enough, let's split it into perfectly sized chunks
-        urls_to_split = sorted(urls)
-        part_number = 1
-        
-        while len(urls_to_split) > 0:
-            n = len(urls_to_split)
-            
-            # If the remaining URLs fit in one batch, this is the last chunk for this group
-            if n <= MAX_BATCH_SIZE:
-                chunk = urls_to_split
-                urls_to_split = []
-            else:
-                # If the remainder after taking a max-sized chunk would be too small,
-                # we need to split the current amount more evenly.
-                remainder = n - MAX_BATCH_SIZE
-                if 0 < remainder < MIN_BATCH_SIZE:
-                    # Split into two roughly equal halves instead of one large and one tiny chunk
-                    split_point = (n // 2) + (n % 2) # Ensure it's ceiling division
-                    chunk = urls_to_split[:split_point]
-                    urls_to_split = urls_to_split[split_point:]
-                else:
-                    # It's safe to take a full-sized chunk
-                    chunk = urls_to_split[:MAX_BATCH_SIZE]
-                    urls_to_split = urls_to_split[MAX_BATCH_SIZE:]
-            
+        for part_number, chunk in enumerate(split_into_batches(urls, MIN_BATCH_SIZE, MAX_BATCH_SIZE), start=1):
             batch_key = f"{group_key}_part_{part_number}"
             final_batches[batch_key] = chunk
-            part_number += 1
 
     # Now, handle all the leftovers from small groups
     if all_leftover_urls:
         print(f"Processing {len(all_leftover_urls)} leftover URLs into misc batches...")
-        misc_urls_to_split = sorted(all_leftover_urls)
-        part_number = 1
-        
-        # Use the same logic, but the very last batch here might be under the minimum size
-        while len(misc_urls_to_split) > 0:
-            n = len(misc_urls_to_split)
-            
-            if n <= MAX_BATCH_SIZE:
-                 chunk = misc_urls_to_split
-                 misc_urls_to_split = []
-            else:
-                remainder = n - MAX_BATCH_SIZE
-                if 0 < remainder < MIN_BATCH_SIZE:
-                    split_point = (n // 2) + (n % 2)
-                    chunk = misc_urls_to_split[:split_point]
-                    misc_urls_to_split = misc_urls_to_split[split_point:]
-                else:
-                    chunk = misc_urls_to_split[:MAX_BATCH_SIZE]
-                    misc_urls_to_split = misc_urls_to_split[MAX_BATCH_SIZE:]
+        # Leftovers span several groups, so they still need ordering by URL alone.
+        misc_urls = sorted(all_leftover_urls)
 
+        # Use the same logic, but the very last batch here might be under the minimum size
+        for part_number, chunk in enumerate(split_into_batches(misc_urls, MIN_BATCH_SIZE, MAX_BATCH_SIZE), start=1):
             batch_key = f"misc_batch_part_{part_number}"
             final_batches[batch_key] = chunk
-            part_number += 1
 
     output_url_count = 0
+    written_urls = set()
     print(f"\nSaving {len(final_batches)} final URL batches to '{output_dir}' directory...")
-    for group_key, urls in final_batches.items():
-        filename = group_key.replace('/', '_') + ".txt"
-        output_path = os.path.join(output_dir, filename)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(urls))
-
-        batch_size = len(urls)
-        output_url_count += batch_size
-        print(f"  - Created '{output_path}' with {batch_size} URLs.")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WRITE_WORKERS) as executor:
+        # map() yields results in submission order, so the report below stays in batch order
+        results = executor.map(
+            write_batch_file,
+            [output_dir] * len(final_batches),
+            final_batches.keys(),
+            final_batches.values(),
+        )
+        for urls, (output_path, batch_size) in zip(final_batches.values(), results):
+            output_url_count += batch_size
+            written_urls.update(urls)
+            print(f"  - Created '{output_path}' with {batch_size} URLs.")
     
     # Final verification summary
     print("\n--- Verification Summary ---")
@@ -138,6 +165,9 @@ def batch_urls_by_directory(input_file, output_dir, base_prefix):
         print("✅ Success: All processed URLs have been accounted for and distributed.")
     else:
         print(f"⚠️ Warning: Mismatch found! {processed_url_count - output_url_count} processed URLs are missing.")
+        missing_urls = {url for _, url in keyed_urls} - written_urls
+        for url in sorted(missing_urls):
+            print(f"  - Missing: {url}")
     print("--------------------------")
         
     print(f"\nProcess complete.")
@@ -1,30 +1,9 @@
 import os
+import io
 import argparse
+import concurrent.futures
 
-def get_rst_path_from_url(url, base_path=""):
-    """
-    Converts a documentation URL to a local .rst file path.
-    This function is reused from the previous script.
-    """
-    if not isinstance(url, str):
-        return None
-
-    prefix = "https://docs.alation.com/en/latest/"
-    suffix = ".html"
-
-    if url.startswith(prefix):
-        relative_path = url[len(prefix):]
-    else:
-        print(f"Warning: URL does not have the expected prefix. Skipping URL: {url}")
-        return None
-
-    if url.endswith(suffix):
-        relative_path = relative_path[:-len(suffix)]
-    
-    rst_file = f"{relative_path}.rst"
-    full_path = os.path.join(base_path, rst_file)
-    
-    return full_path
+from rst_common import IO_BUFFER_SIZE, MAX_WORKERS, get_rst_path_from_url, write_file_atomically
 
 def replace_separator_in_meta_block(file_path):
     """
@@ -32,8 +11,8 @@ def replace_separator_in_meta_block(file_path):
     with semicolon separators in its values.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        with open(file_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            data = f.read()
     except FileNotFoundError:
         print(f"❌ Error: File not found at '{file_path}'. Skipping.")
         return
@@ -41,6 +20,15 @@ def replace_separator_in_meta_block(file_path):
         print(f"❌ Error reading file '{file_path}': {e}")
         return
 
+    # --- Cheap whole-file checks before doing any line-level parsing ---
+    if ".. meta::" not in data:
+        print(f"⚠️ Info: No '.. meta::' block found in '{file_path}'. Skipping.")
+        return
+    if ',' not in data:
+        print(f"👍 Info: No commas found to replace in the meta block of '{file_path}'. No changes needed.")
+        return
+
+    lines = io.StringIO(data).readlines()
     meta_start_index = -1
     meta_end_index = -1
     changes_made = False
@@ -67,6 +55,9 @@ def replace_separator_in_meta_block(file_path):
     # --- Process each line within the meta block for replacement ---
     for i in range(meta_start_index + 1, meta_end_index):
         line = lines[i]
+        # Lines without a comma never change, so skip them before splitting
+        if ',' not in line:
+            continue
         # Split the line into key and value, e.g., "   :topics:" and "Value1, Value2"
         parts = line.split(':', 2)
         if len(parts) == 3:
@@ -85,8 +76,7 @@ def replace_separator_in_meta_block(file_path):
     # --- Write the changes back to the file if any were made ---
     if changes_made:
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.writelines(lines)
+            write_file_atomically(file_path, ''.join(lines))
             print(f"✅ Successfully updated separators in {file_path}")
         except IOError as e:
             print(f"❌ Error: Could not write to file '{file_path}': {e}")
@@ -113,7 +103,7 @@ def main():
         return
 
     print(f"Reading URLs from '{args.url_file}'...")
-    with open(args.url_file, 'r', encoding='utf-8') as f:
+    with open(args.url_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
         urls = [line.strip() for line in f if line.strip()]
 
     if not urls:
@@ -121,10 +111,16 @@ def main():
         return
 
     print(f"\nFound {len(urls)} URLs. Starting to process files...")
+    rst_paths = []
     for url in urls:
         rst_path = get_rst_path_from_url(url)
         if rst_path:
-            replace_separator_in_meta_block(rst_path)
+            rst_paths.append(rst_path)
+
+    # Each file is independent, so process them concurrently. Duplicate paths are
+    # dropped first so that two threads never rewrite the same file.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(replace_separator_in_meta_block, dict.fromkeys(rst_paths)))
     
     print("\nProcessing complete.")
 
@@ -0,0 +1,71 @@
+"""
+Helpers shared by the scripts that edit .rst files from lists of documentation URLs.
+"""
+import os
+import functools
+import shutil
+
+# Larger buffer so each small .rst file is read/written in as few syscalls as possible.
+IO_BUFFER_SIZE = 131072
+# File updates are I/O bound, so use more threads than cores.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# The parts of a documentation URL that are stripped to get the .rst path
+DOCS_URL_PREFIX = "https://docs.alation.com/en/latest/"
+DOCS_URL_SUFFIX = ".html"
+
+@functools.lru_cache(maxsize=65536)
+def get_rst_path_from_url(url, base_path=""):
+    """
+    Converts a documentation URL to a local .rst file path.
+
+    Args:
+        url (str): The full documentation URL.
+        base_path (str): The base directory of the documentation source.
+
+    Returns:
+        str: The relative file path for the .rst file or None if URL is invalid.
+    """
+    if not isinstance(url, str):
+        return None
+
+    # Clean the URL to get the core path
+    relative_path = url.removeprefix(DOCS_URL_PREFIX)
+    if len(relative_path) == len(url):
+        # If the prefix doesn't match, we can't determine the path
+        print(f"Warning: URL does not have the expected prefix. Skipping URL: {url}")
+        return None
+
+    relative_path = relative_path.removesuffix(DOCS_URL_SUFFIX)
+    
+    # Construct the final .rst file path
+    rst_file = f"{relative_path}.rst"
+    
+    # Join with the base path if one is provided; the default empty base needs no join
+    if not base_path:
+        return rst_file
+    return os.path.join(base_path, rst_file)
+
+def write_file_atomically(file_path, *parts):
+    """
+    Writes text to a file via a temporary sibling file and os.replace.
+
+    An interrupted run leaves either the old or the new file in place, never a truncated one,
+    and readers such as a running Sphinx build never see a partial write.
+
+    Args:
+        file_path (str): The path of the file to replace.
+        *parts (str): The new content, written in order.
+    """
+    tmp_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            for part in parts:
+                f.write(part)
+        # Keep the original file's permissions on the replacement
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -7,7 +7,6 @@ import requests
 import os
 import logging
 from dotenv import load_dotenv
-import shutil
 
 # Load .env file
 load_dotenv()
@@ -18,6 +17,8 @@ ALATION_REPO_PATH = Path.home() / "Developer" / "alation"
 SWAGGER_SPECS_PATH = ALATION_REPO_PATH / "django" / "static" / "swagger" / "specs"
 LOGICAL_METADATA_PATH = SWAGGER_SPECS_PATH / "logical_metadata"
 LOG_FILE = SCRIPT_DIR / "openapi_upload.log"
+# Read buffer for CLI output pipes; linters can emit a lot of output
+PIPE_BUFFER_SIZE = 1 << 16
 
 # Setup logging
 logging.basicConfig(
@@ -29,6 +30,10 @@ logging.basicConfig(
     ]
 )
 
+# Prefer the libyaml-backed loader/dumper; fall back to pure Python if PyYAML was built without it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 README_API_KEY = os.getenv("README_API_KEY")
 README_API_BASE_URL = "https://dash.readme.com/api/v1"
 
@@ -36,11 +41,49 @@ if not README_API_KEY:
     logging.error("README_API_KEY is not set.")
     sys.exit(1)
 
-def pull_latest_alation_repo():
+def start_alation_repo_pull():
+    """Starts 'git pull' in the background so other setup can run while it is in flight."""
     logging.info("Pulling latest changes from the Alation repository...")
-    subprocess.run(["git", "-C", str(ALATION_REPO_PATH), "pull"], check=True)
+    return subprocess.Popen(
+        ["git", "-C", str(ALATION_REPO_PATH), "pull"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8'
+    )
+
+def finish_alation_repo_pull(process: subprocess.Popen):
+    output, _ = process.communicate()
+    for line in output.splitlines():
+        if line.strip():
+            logging.info(line.strip())
+    if process.returncode != 0:
+        logging.error(f"❌ git pull failed with exit code {process.returncode}")
+        sys.exit(1)
     logging.info("Repo updated.")
 
+def copy_if_changed(src: str, dst: str):
+    """copytree copy function that skips files whose size and mtime already match."""
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+        if src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+            return dst
+    except FileNotFoundError:
+        pass
+    return shutil.copy2(src, dst)
+
+def remove_stale_entries(src_folder: Path, dest_folder: Path):
+    """Deletes files and folders under dest_folder that no longer exist under src_folder."""
+    for dirpath, dirnames, filenames in os.walk(dest_folder):
+        src_names = set(os.listdir(src_folder / os.path.relpath(dirpath, dest_folder)))
+        for dirname in [d for d in dirnames if d not in src_names]:
+            shutil.rmtree(os.path.join(dirpath, dirname))
+            dirnames.remove(dirname)
+        for filename in filenames:
+            if filename not in src_names:
+                os.remove(os.path.join(dirpath, filename))
+
 def copy_yaml_file_to_script_dir(filename: str):
     if filename in ["field", "field_value"]:
         source = LOGICAL_METADATA_PATH / f"{filename}.yaml"
@@ -58,12 +101,14 @@ def copy_yaml_file_to_script_dir(filename: str):
     for folder in ["common", "data_products"]:
         src_folder = SWAGGER_SPECS_PATH / folder
         dest_folder = SCRIPT_DIR / folder
-        if dest_folder.exists():
-            shutil.rmtree(dest_folder)
-        shutil.copytree(src_folder, dest_folder)
+        # Copy incrementally: copy2 keeps mtimes, so unchanged files are skipped on re-runs
+        shutil.copytree(src_folder, dest_folder, dirs_exist_ok=True, copy_function=copy_if_changed)
+        # Files deleted or renamed upstream must not linger and satisfy stale $refs
+        remove_stale_entries(src_folder, dest_folder)
         logging.info(f"Copied folder '{folder}' to {dest_folder}")
 
-def check_and_create_version(version: str):
+def fetch_readme_versions():
+    """Returns the ReadMe version names. Read-only, so it can run while git pull is in flight."""
     headers = {
         "Authorization": f"Basic {README_API_KEY}",
         "Accept": "application/json"
@@ -74,7 +119,15 @@ def check_and_create_version(version: str):
         logging.error("Failed to fetch ReadMe versions.")
         sys.exit(1)
 
-    if any(v["version"] == version for v in response.json()):
+    return [v["version"] for v in response.json()]
+
+def check_and_create_version(version: str, existing_versions: list):
+    headers = {
+        "Authorization": f"Basic {README_API_KEY}",
+        "Accept": "application/json"
+    }
+
+    if version in existing_versions:
         logging.info(f"Version '{version}' already exists.")
         return
 
@@ -98,7 +151,7 @@ def check_and_create_version(version: str):
 
 def read_and_prep_openapi(file_path: Path, version: str):
     with file_path.open("r") as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=YAML_LOADER)
 
     pos = list(data.keys()).index("openapi")
     items = list(data.items())
@@ -111,10 +164,10 @@ def read_and_prep_openapi(file_path: Path, version: str):
 
     edited_file = file_path.with_name(file_path.stem + "_edited.yaml")
     with edited_file.open("w") as f:
-        yaml.dump(data, f, sort_keys=False)
+        yaml.dump(data, f, Dumper=YAML_DUMPER, sort_keys=False)
 
     logging.info(f"Updated YAML written to: {edited_file}")
-    return edited_file
+    return edited_file, data["info"]["title"]
 
 def get_api_id(api_name: str, version: str):
     headers = {
@@ -141,24 +194,28 @@ def validate_with_swagger_cli(file_path: Path):
     if not npx_path:
         logging.error("❌ 'npx' was not found in your system PATH.")
         sys.exit(1)
-    try:
-        subprocess.run(
-            [npx_path, "--yes", "swagger-cli", "validate", str(file_path)],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True,
-            text=True
-        )
-        logging.info("✅ Swagger CLI validation passed.")
-    except subprocess.CalledProcessError as e:
+    process = subprocess.Popen(
+        [npx_path, "--yes", "swagger-cli", "validate", str(file_path)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        bufsize=PIPE_BUFFER_SIZE
+    )
+    for line in process.stdout:
+        clean = line.strip()
+        if not clean:
+            continue
+        if "error" in clean.lower():
+            logging.error(f"• {clean}")
+        else:
+            logging.info(f"• {clean}")
+    process.wait()
+
+    if process.returncode != 0:
         logging.error("❌ Swagger CLI validation failed.")
-        output = e.stderr.strip() or e.stdout.strip() or "Unknown error"
-        for line in output.splitlines():
-            if "error" in line.lower():
-                logging.error(f"• {line.strip()}")
-            else:
-                logging.warning(f"• {line.strip()}")
         raise RuntimeError("Swagger CLI validation failed")
+    logging.info("✅ Swagger CLI validation passed.")
 
 def validate_with_redocly_cli(file_path: Path):
     logging.info(f"🔍 Validating OpenAPI YAML with Redocly CLI: {file_path}")
@@ -172,7 +229,8 @@ def validate_with_redocly_cli(file_path: Path):
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
-            encoding='utf-8'  # prevent charmap decode error on Windows
+            encoding='utf-8',  # prevent charmap decode error on Windows
+            bufsize=PIPE_BUFFER_SIZE
         )
         for line in process.stdout:
             clean = line.strip()
@@ -194,11 +252,7 @@ def validate_with_redocly_cli(file_path: Path):
         logging.error(f"Unexpected error during Redocly CLI validation: {e}")
         sys.exit(1)
 
-def upload_to_readme(edited_path: Path, version: str, dry_run=False):
-    with edited_path.open("r") as f:
-        data = yaml.safe_load(f)
-        api_name = data["info"]["title"]
-
+def upload_to_readme(edited_path: Path, api_name: str, version: str, dry_run=False):
     api_id = get_api_id(api_name, version)
 
     npx_path = shutil.which("npx")
@@ -227,7 +281,8 @@ def upload_to_readme(edited_path: Path, version: str, dry_run=False):
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
-            encoding='utf-8'
+            encoding='utf-8',
+            bufsize=PIPE_BUFFER_SIZE
         )
         for line in process.stdout:
             clean = line.strip()
@@ -260,17 +315,28 @@ def main():
     use_local = "--local" in sys.argv
 
     input_path = SCRIPT_DIR / f"{input_file}.yaml"
+    pull_process = None
     if not use_local:
-        pull_latest_alation_repo()
-        copy_yaml_file_to_script_dir(input_file)
+        pull_process = start_alation_repo_pull()
     else:
         if not input_path.exists():
             logging.error(f"Local file {input_path} not found.")
             sys.exit(1)
         logging.info(f"Using local file: {input_path}")
 
-    check_and_create_version(version)
-    edited_path = read_and_prep_openapi(input_path, version)
+    # Only the read-only version lookup overlaps with git pull. The pull must succeed
+    # before anything prompts or creates a ReadMe version, and it is always waited for.
+    try:
+        existing_versions = fetch_readme_versions()
+    finally:
+        if pull_process:
+            finish_alation_repo_pull(pull_process)
+
+    if not use_local:
+        copy_yaml_file_to_script_dir(input_file)
+
+    check_and_create_version(version, existing_versions)
+    edited_path, api_name = read_and_prep_openapi(input_path, version)
 
     if dry_run:
         logging.info("Running in dry-run mode. Choose validation type:")
@@ -298,7 +364,7 @@ def main():
         logging.info("Dry-run completed.")
         return
 
-    upload_to_readme(edited_path, version, dry_run)
+    upload_to_readme(edited_path, api_name, version, dry_run)
     logging.info("Done!")
 
 if __name__ == "__main__":
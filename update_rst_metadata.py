@@ -1,156 +1,216 @@
-import pandas as pd
+import csv
 import os
+import io
 import re
 import argparse
+import concurrent.futures
+import mmap
+from collections import Counter
 
-def get_rst_path_from_url(url, base_path=""):
+from rst_common import MAX_WORKERS, get_rst_path_from_url, write_file_atomically
+
+# Accepted names for the CSV column holding the page URL, in order of preference
+URL_COLUMNS = ('Page URL', 'URL')
+# CSV columns carried through to the .. meta:: directive
+METADATA_COLUMNS = ('Keywords', 'Topics', 'Functional Area', 'User Role', 'Deployment Type')
+
+# Define the order and mapping from the CSV columns to the directive fields
+FIELD_MAPPING = (
+    ('Deployment Type', 'deployment_type'),
+    ('User Role', 'user_role'),
+    ('Functional Area', 'functional_area'),
+    ('Topics', 'topics'),
+)
+
+# Labels for the outcomes counted in the run summary, in summary order. Rows dropped while
+# reading the CSV are counted in main(); the others are reported by add_metadata_to_file.
+SUMMARY_LABELS = {
+    'updated': "Files updated",
+    'existing_meta': "Skipped, '.. meta::' already present (use -f to overwrite)",
+    'no_header': "Skipped, no page header found",
+    'invalid_url': "Rows skipped, missing or invalid URL",
+    'no_metadata': "Rows skipped, no metadata to add",
+    'duplicate': "Rows skipped, another row targets the same file",
+    'missing': "Skipped, file not found",
+    'error': "Failed to read or write",
+}
+
+# The page title sits at the top of a document; files without one in this many lines are skipped
+TITLE_SEARCH_LINES = 50
+# A non-blank title line followed by its underline, a line made only of '=' characters
+# (ignoring surrounding whitespace). The match ends where the meta block is inserted.
+HEADER_RE = re.compile(r'^[^\S\n]*\S[^\n]*\n[^\S\n]*=+[^\S\n]*(?:\n|\Z)', re.MULTILINE)
+# Either separator may be used between values in a metadata cell
+FIELD_SEPARATOR_RE = re.compile(r'[;,]')
+
+def find_missing_files(file_paths):
     """
-    Converts a documentation URL to a local .rst file path.
+    Finds the .rst files that do not exist, listing each parent directory only once.
 
     Args:
-        url (str): The full URL from the CSV file.
-        base_path (str): The base directory of the documentation source.
+        file_paths (iterable): The .rst file paths to check.
 
     Returns:
-        str: The relative file path for the .rst file or None if URL is invalid.
+        list: The paths that do not exist, in input order.
     """
-    if not isinstance(url, str):
-        return None
+    names_by_dir = {}
+    missing = []
+    for file_path in file_paths:
+        directory, name = os.path.split(file_path)
+        if directory not in names_by_dir:
+            try:
+                with os.scandir(directory or '.') as entries:
+                    names_by_dir[directory] = {entry.name for entry in entries if entry.is_file()}
+            except OSError:
+                names_by_dir[directory] = set()
+        # A name that is not listed may still exist on a case-insensitive filesystem
+        if name not in names_by_dir[directory] and not os.path.isfile(file_path):
+            missing.append(file_path)
+    return missing
 
-    # Define the parts of the URL to strip
-    prefix = "https://docs.alation.com/en/latest/"
-    suffix = ".html"
+def read_rst_file(file_path, skip_if_meta=False):
+    """
+    Opens an .rst file once, checks it for a .. meta:: directive and decodes its text.
 
-    # Clean the URL to get the core path
-    if url.startswith(prefix):
-        relative_path = url[len(prefix):]
-    else:
-        # If the prefix doesn't match, we can't determine the path
-        print(f"Warning: URL does not have the expected prefix. Skipping URL: {url}")
-        return None
+    The check runs on the memory-mapped bytes, so with skip_if_meta a file that already
+    has a directive is never read into memory or decoded.
 
-    if url.endswith(suffix):
-        relative_path = relative_path[:-len(suffix)]
-    
-    # Construct the final .rst file path
-    rst_file = f"{relative_path}.rst"
-    
-    # Join with the base path if one is provided
-    full_path = os.path.join(base_path, rst_file)
-    
-    return full_path
+    Args:
+        file_path (str): The path to the .rst file to read.
+        skip_if_meta (bool): If True, stop before decoding when a directive is found.
 
-def add_metadata_to_file(file_path, metadata, force_overwrite=False):
+    Returns:
+        tuple: (has_meta, text), where text is None if the file was skipped.
     """
-    Adds or overwrites a formatted .. meta:: directive in an .rst file.
+    with open(file_path, 'rb') as f:
+        # Empty files cannot be memory-mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return False, ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            has_meta = mm.find(b".. meta::") != -1
+            if has_meta and skip_if_meta:
+                return True, None
+            data = mm[:]
+    # Translate line endings the way reading in text mode would
+    text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return has_meta, text
+
+def build_meta_lines(metadata):
+    """
+    Builds the indented field lines of a .. meta:: directive from one CSV row.
 
     Args:
-        file_path (str): The path to the .rst file to be modified.
         metadata (dict): A dictionary containing the metadata to add.
-        force_overwrite (bool): If True, overwrites any existing meta directive.
-    """
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except FileNotFoundError:
-        print(f"Warning: File not found at '{file_path}'. Skipping.")
-        return
-    except Exception as e:
-        print(f"Error reading file '{file_path}': {e}")
-        return
 
-    # --- METADATA BLOCK GENERATION ---
+    Returns:
+        list: The formatted field lines; empty if the row has no metadata.
+    """
     meta_lines_to_add = []
-    
-    # Define the order and mapping from the CSV to the directive fields
-    field_mapping = {
-        'Deployment Type': 'deployment_type',
-        'User Role': 'user_role',
-        'Functional Area': 'functional_area',
-        'Topics': 'topics',
-    }
-
-    for csv_key, meta_key in field_mapping.items():
+
+    for csv_key, meta_key in FIELD_MAPPING:
         value = metadata.get(csv_key)
-        if pd.notna(value) and str(value).strip():
-            # Sanitize the value: replace semicolons and normalize comma spacing.
-            sanitized_value_str = str(value).replace(';', ',')
-            # Split by comma, strip whitespace from each part, and join with " ; "
-            items = [item.strip() for item in sanitized_value_str.split(',') if item.strip()]
+        if value is None:
+            continue
+        value = str(value)
+        if value and not value.isspace():
+            # Sanitize the value: split on semicolons or commas in one pass,
+            # strip whitespace from each part, and join with " ; "
+            items = (item.strip() for item in FIELD_SEPARATOR_RE.split(value))
             # MODIFIED LINE: Changed separator to a semicolon with spaces.
-            final_value = " ; ".join(items)
+            final_value = " ; ".join(item for item in items if item)
             # Use three spaces for correct RST indentation instead of a tab.
             meta_lines_to_add.append(f"   :{meta_key}: {final_value}")
             
     # Handle the "Keywords" column
     keywords = metadata.get('Keywords')
-    if pd.notna(keywords) and str(keywords).strip():
+    if keywords is not None and str(keywords).strip():
         # Split by comma, strip whitespace, ensure uniqueness, and re-join
-        unique_keywords = sorted(list({k.strip() for k in str(keywords).split(',') if k.strip()}))
+        unique_keywords = sorted({k.strip() for k in str(keywords).split(',') if k.strip()})
         if unique_keywords:
             # Use three spaces for correct RST indentation instead of a tab.
             # MODIFIED LINE: Changed separator to a semicolon with spaces.
             meta_lines_to_add.append(f"   :keywords: {' ; '.join(unique_keywords)}")
 
-    if not meta_lines_to_add:
-        print(f"Info: No metadata to add for '{file_path}'. Skipping.")
-        return
+    return meta_lines_to_add
 
+def add_metadata_to_file(file_path, meta_lines_to_add, force_overwrite=False):
+    """
+    Adds or overwrites a formatted .. meta:: directive in an .rst file.
+
+    Args:
+        file_path (str): The path to the .rst file to be modified.
+        meta_lines_to_add (list): The non-empty field lines from build_meta_lines.
+        force_overwrite (bool): If True, overwrites any existing meta directive.
+
+    Returns:
+        str: The outcome for the run summary, one of the keys of SUMMARY_LABELS.
+    """
     # --- CHECK FOR AND HANDLE EXISTING META DIRECTIVE ---
-    meta_start_index = -1
-    for i, line in enumerate(lines):
-        if ".. meta::" in line:
-            meta_start_index = i
-            break
-            
-    if meta_start_index != -1:
-        if not force_overwrite:
-            print(f"Info: '.. meta::' exists in '{file_path}'. Use -f to overwrite. Skipping.")
-            return
-        else:
-            print(f"Info: Found existing '.. meta::' in '{file_path}'. Overwriting due to -f flag.")
-            # Find the end of the existing meta block
-            meta_end_index = meta_start_index + 1
-            while meta_end_index < len(lines):
-                line_content = lines[meta_end_index]
-                # The block ends when a line has content but is not indented
-                if line_content.strip() and not line_content.startswith((' ', '\t')):
-                    break
-                meta_end_index += 1
-            
-            # Remove the old block (including any surrounding blank lines handled by insertion)
-            del lines[meta_start_index:meta_end_index]
-            # Remove the blank line that might have been before the old meta block
-            if meta_start_index > 0 and not lines[meta_start_index - 1].strip():
-                del lines[meta_start_index - 1]
+    try:
+        # Without -f an existing directive means the file is skipped without being decoded
+        has_meta, text = read_rst_file(file_path, skip_if_meta=not force_overwrite)
+    except FileNotFoundError:
+        print(f"Warning: File not found at '{file_path}'. Skipping.")
+        return "missing"
+    except Exception as e:
+        print(f"Error reading file '{file_path}': {e}")
+        return "error"
 
+    if has_meta and not force_overwrite:
+        print(f"Info: '.. meta::' exists in '{file_path}'. Use -f to overwrite. Skipping.")
+        return "existing_meta"
 
-    # --- FIND INSERTION POINT AND ADD NEW META BLOCK ---
-    underline_index = -1
-    for i in range(1, len(lines)):
-        line_content = lines[i].strip()
-        # Only match lines that consist solely of '=' characters.
-        if line_content and all(c == '=' for c in line_content):
-            # Ensure the line above it (the title) is not blank.
-            if lines[i-1].strip():
-                underline_index = i
+    if has_meta:
+        lines = io.StringIO(text).readlines()
+        meta_start_index = next(i for i, line in enumerate(lines) if ".. meta::" in line)
+        print(f"Info: Found existing '.. meta::' in '{file_path}'. Overwriting due to -f flag.")
+        # Find the end of the existing meta block
+        meta_end_index = meta_start_index + 1
+        while meta_end_index < len(lines):
+            line_content = lines[meta_end_index]
+            # The block ends when a line has content but is not indented
+            if line_content.strip() and not line_content.startswith((' ', '\t')):
                 break
-    
-    if underline_index == -1:
-        print(f"Warning: Could not find a page header underlined with '=' in '{file_path}'. Skipping.")
-        return
+            meta_end_index += 1
+        
+        # Remove the old block (including any surrounding blank lines handled by insertion)
+        del lines[meta_start_index:meta_end_index]
+        # Remove the blank line that might have been before the old meta block
+        if meta_start_index > 0 and not lines[meta_start_index - 1].strip():
+            del lines[meta_start_index - 1]
+        text = ''.join(lines)
+
+
+    # --- FIND INSERTION POINT AND ADD NEW META BLOCK ---
+    # Only the first TITLE_SEARCH_LINES lines are searched for the page header
+    search_end = 0
+    for _ in range(TITLE_SEARCH_LINES):
+        search_end = text.find('\n', search_end) + 1
+        if not search_end:
+            search_end = len(text)
+            break
+
+    header_match = HEADER_RE.search(text, 0, search_end)
+    if not header_match:
+        print(f"Warning: Could not find a page header underlined with '=' in the first {TITLE_SEARCH_LINES} lines of '{file_path}'. Skipping.")
+        return "no_header"
 
     # Construct the final block
-    full_meta_block = "\n" + ".. meta::\n" + "\n".join(meta_lines_to_add) + "\n\n"
-    lines.insert(underline_index + 1, full_meta_block)
+    # One join builds the whole block, from the blank line before the directive to the one after it
+    full_meta_block = "\n".join(["", ".. meta::", *meta_lines_to_add, "", ""])
+
+    # The block goes right after the underline, spliced into the text by offset
+    insert_at = header_match.end()
 
     # Write the modified content back to the file
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+        write_file_atomically(file_path, text[:insert_at], full_meta_block, text[insert_at:])
         print(f"Successfully updated metadata in {file_path}")
     except IOError as e:
         print(f"Error: Could not write to file '{file_path}': {e}")
+        return "error"
+
+    return "updated"
 
 
 def main():
@@ -174,61 +234,106 @@ def main():
         return
 
     print(f"Reading metadata from '{csv_file}'...")
+
+    doc_base_path = "" 
+
+    # One metadata row per target file, so each file is written at most once and by one thread.
+    # Applying rows in order would keep the first row's block (later rows find it and skip),
+    # or with -f the last row's block (it overwrites the others), so only that row is kept.
+    # The output then matches a single-row run. With -f, rows applied one by one to a file
+    # without a block would also drop the blank lines that follow the block.
+    file_tasks = {}
+    row_count = 0
+    outcomes = Counter()
+
     try:
-        # Use the simple, direct pandas reader for standard CSV files.
-        # The 'python' engine is more flexible with quotes and delimiters.
-        df = pd.read_csv(csv_file, engine='python', index_col=False)
+        # Stream the CSV one row at a time; no step needs the whole table in memory.
+        # 'utf-8-sig' drops the byte-order mark that some spreadsheet exports add.
+        with open(csv_file, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            # Clean up column names by stripping any extra whitespace
+            columns = [col.strip() for col in reader.fieldnames or []]
+            reader.fieldnames = columns
+
+            if not columns:
+                print("Warning: The CSV file was processed, but no data rows were found. Please check the file content and format.")
+                return
+            print(f"Detected columns in CSV: {columns}")
+
+            # --- Dynamically find the URL column to make the script more robust ---
+            url_column_found = None
+            for col in columns:
+                if col in URL_COLUMNS:
+                    url_column_found = col
+                    break
+
+            if not url_column_found:
+                print(f"\nError: Could not find a URL column in the CSV.")
+                print(f"The script looked for one of these names: {list(URL_COLUMNS)}")
+                return
+            
+            print(f"Using '{url_column_found}' as the URL column for processing.")
+
+            print("\nStarting to process .rst files...")
+            for index, row in enumerate(reader):
+                row_count += 1
+                url = row.get(url_column_found)
+                if not url:
+                    print(f"Warning: Skipping row {index + 2} due to missing or invalid URL. Row data: {row}")
+                    outcomes['invalid_url'] += 1
+                    continue
+
+                metadata = {col: row.get(col) for col in METADATA_COLUMNS}
+                # A row without metadata cannot change any file, so drop it before any path or file work.
+                # The lines built here are the ones the worker writes.
+                meta_lines = build_meta_lines(metadata)
+                if not meta_lines:
+                    print(f"Info: No metadata to add for row {index + 2}. Skipping.")
+                    outcomes['no_metadata'] += 1
+                    continue
+
+                rst_path = get_rst_path_from_url(url, doc_base_path)
+                
+                if not rst_path:
+                    outcomes['invalid_url'] += 1
+                    continue
+                if rst_path in file_tasks:
+                    outcomes['duplicate'] += 1
+                    if not args.force:
+                        continue
+                file_tasks[rst_path] = meta_lines
 
     except Exception as e:
         print(f"Error: Could not parse the CSV file. Please ensure it is formatted correctly. Details: {e}")
         return
         
-    if df.empty:
+    if row_count == 0:
         print("Warning: The CSV file was processed, but no data rows were found. Please check the file content and format.")
         return
     else:
-        print(f"Successfully parsed {len(df)} data rows.")
-        
-    # Clean up column names by stripping any extra whitespace
-    df.columns = df.columns.str.strip()
-    print(f"Detected columns in CSV: {df.columns.tolist()}")
+        print(f"Successfully parsed {row_count} data rows.")
 
-    # --- Dynamically find the URL column to make the script more robust ---
-    url_column_found = None
-    possible_url_columns = ['Page URL', 'URL']
-    
-    for col in df.columns:
-        if col in possible_url_columns:
-            url_column_found = col
-            break
+    # Drop missing files before scheduling any work for them
+    for rst_path in find_missing_files(file_tasks):
+        print(f"Warning: File not found at '{rst_path}'. Skipping.")
+        del file_tasks[rst_path]
+        outcomes['missing'] += 1
 
-    if not url_column_found:
-        print(f"\nError: Could not find a URL column in the CSV.")
-        print(f"The script looked for one of these names: {possible_url_columns}")
-        return
-    
-    print(f"Using '{url_column_found}' as the URL column for processing.")
-    
-    metadata_columns = [
-        'Keywords', 'Topics', 'Functional Area', 'User Role', 'Deployment Type'
-    ]
-    
-    doc_base_path = "" 
+    # Files are independent and the work is I/O bound, so update them concurrently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(add_metadata_to_file, rst_path, meta_lines, args.force)
+            for rst_path, meta_lines in file_tasks.items()
+        ]
+        outcomes.update(future.result() for future in concurrent.futures.as_completed(futures))
 
-    print("\nStarting to process .rst files...")
-    for index, row in df.iterrows():
-        print(f"Processing row {index + 2}/{len(df) + 1}...")
-        url = row.get(url_column_found)
-        if not url or pd.isna(url):
-            print(f"Warning: Skipping row {index + 2} due to missing or invalid URL. Row data: {row.to_dict()}")
-            continue
+    # A single summary replaces per-row progress output
+    print("\n--- Summary ---")
+    for outcome, label in SUMMARY_LABELS.items():
+        if outcomes[outcome]:
+            print(f"{label}: {outcomes[outcome]}")
+    print("---------------")
 
-        rst_path = get_rst_path_from_url(url, doc_base_path)
-        
-        if rst_path:
-            metadata = {col: row.get(col) for col in metadata_columns}
-            add_metadata_to_file(rst_path, metadata, force_overwrite=args.force)
-    
     print("\nProcessing complete.")
 
 
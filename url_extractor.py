@@ -1,9 +1,34 @@
 import requests
-from bs4 import BeautifulSoup
-import re
-from urllib.parse import urljoin, urlparse, urlunparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from urllib.parse import urljoin
+import argparse
 import concurrent.futures
 import os
+import re
+import threading
+from collections import defaultdict
+
+# Each worker thread keeps its own requests.Session (sessions are not guaranteed to be
+# thread-safe), so connections to the docs host are reused across checks.
+thread_local = threading.local()
+
+# Status checks spend almost all their time waiting on the network, so run many at once.
+MAX_WORKERS = 50
+
+# Without --verbose, report progress once per this many checked pages
+PROGRESS_INTERVAL = 100
+
+# Write buffer for the result files, so each list goes out in as few writes as possible
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Scheme and host of a URL plus any leading slashes of its path, e.g. 'https://docs.alation.com/'
+URL_ROOT_RE = re.compile(r'^(https?://[^/?#]*)/*')
+
+# Use the C-based lxml parser when it is installed; Python's built-in parser otherwise
+HTML_PARSER = "lxml" if builder_registry.lookup("lxml") else "html.parser"
 
 def get_urls_from_html_sitemap(sitemap_file_path, base_url):
     """
@@ -20,7 +45,8 @@ def get_urls_from_html_sitemap(sitemap_file_path, base_url):
         with open(sitemap_file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        soup = BeautifulSoup(content, "html.parser")
+        # Only build tree nodes for links; the rest of the page is skipped while parsing
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=SoupStrainer("a", href=True))
         
         # Find all <a> tags with an href attribute
         links = soup.find_all("a", href=True)
@@ -35,14 +61,69 @@ def get_urls_from_html_sitemap(sitemap_file_path, base_url):
             
     return list(urls)
 
-def check_url_status(url):
+def get_session():
+    """
+    Returns the calling thread's requests.Session, creating it on first use.
+    """
+    session = getattr(thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(max_retries=Retry(total=2, backoff_factor=0.3))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        thread_local.session = session
+    return session
+
+def find_locally_built_pages(pages, build_dir, docs_root):
+    """
+    Finds the pages whose HTML file exists in a local Sphinx build.
+
+    The build directory is walked once, so each page is then resolved with a set lookup.
+
+    Args:
+        pages (iterable): Page URLs without a '#section' fragment.
+        build_dir (str): The root of the local HTML build, e.g. '_build/html'.
+        docs_root (str): The URL that corresponds to build_dir, ending with '/'.
+
+    Returns:
+        set: The pages that can be resolved without a network request.
+    """
+    built_files = set()
+    for dirpath, _, filenames in os.walk(build_dir):
+        for filename in filenames:
+            if filename.endswith('.html'):
+                built_files.add(os.path.relpath(os.path.join(dirpath, filename), build_dir).replace(os.sep, '/'))
+
+    local_pages = set()
+    for page in pages:
+        if not page.startswith(docs_root):
+            continue
+        relative_path = page[len(docs_root):]
+        # A directory URL is served by its index page
+        if not relative_path or relative_path.endswith('/'):
+            relative_path += 'index.html'
+        if relative_path in built_files:
+            local_pages.add(page)
+    return local_pages
+
+def check_url_status(url, local_pages=frozenset()):
     """
     Checks if a URL is active or returns a 404 error.
     Returns the URL and its status ('OK' or '404 Not Found').
+
+    URLs in local_pages exist in the local build and are reported as 'OK' without a request.
     """
+    if url in local_pages:
+        return url, 'OK'
     try:
-        # Using GET instead of HEAD as some servers don't respond properly to HEAD requests
-        response = requests.get(url, allow_redirects=True, timeout=10)
+        session = get_session()
+        # HEAD returns the status without downloading the page body
+        response = session.head(url, allow_redirects=True, timeout=10)
+        if response.status_code in (405, 501):
+            # Some servers don't respond properly to HEAD requests, so fall back to GET.
+            # Streaming means only the headers are read before the connection is released.
+            response = session.get(url, allow_redirects=True, timeout=10, stream=True)
+            response.close()
         if response.status_code == 404:
             return url, '404 Not Found'
         return url, 'OK'
@@ -53,6 +134,18 @@ def main():
     """
     Main function to extract, clean, check URLs, and save them to files.
     """
+    parser = argparse.ArgumentParser(description="Extract URLs from a local HTML sitemap and check their status.")
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Print the result for every URL instead of periodic progress updates."
+    )
+    parser.add_argument(
+        "--build-dir",
+        help="Root of a local HTML build (e.g. '_build/html'). Pages found there are not checked over HTTP."
+    )
+    args = parser.parse_args()
+
     # !!! IMPORTANT !!!
     # Please update this path to point to your local sitemap.html file.
     sitemap_file_path = "sitemap.html"  # <--- CHANGE THIS (e.g., "C:/build/sitemap.html" or "./build/sitemap.html")
@@ -68,74 +161,75 @@ def main():
         return
 
     print("Adding '/en/latest/' to URL paths for validation...")
-    urls_to_validate = set()
-    for url in sitemap_urls:
-        try:
-            parsed_url = urlparse(url)
-            # Construct the new path, e.g., from '/admins/page.html' to '/en/latest/admins/page.html'
-            path_segment = parsed_url.path.lstrip('/')
-            new_path = f"/en/latest/{path_segment}"
-            
-            # Rebuild the URL with the new path
-            url_with_version = urlunparse((
-                parsed_url.scheme,
-                parsed_url.netloc,
-                new_path,
-                parsed_url.params,
-                parsed_url.query,
-                parsed_url.fragment
-            ))
-            urls_to_validate.add(url_with_version)
-        except Exception as e:
-            print(f"Skipping malformed URL '{url}': {e}")
+    # Construct the new path, e.g., from '/admins/page.html' to '/en/latest/admins/page.html'
+    urls_to_validate = {URL_ROOT_RE.sub(r'\1/en/latest/', url, count=1) for url in sitemap_urls}
 
     # Remove duplicates from the initial list
     unique_urls = sorted(list(urls_to_validate))
     
-    print(f"Found {len(unique_urls)} unique URLs. Checking their status. This may take a moment...")
+    # The HTTP status of a page does not depend on the '#section' fragment, so each page
+    # is requested once and its status applies to every URL that points into it.
+    urls_by_page = defaultdict(list)
+    for url in unique_urls:
+        urls_by_page[url.partition('#')[0]].append(url)
+
+    local_pages = frozenset()
+    if args.build_dir:
+        if os.path.isdir(args.build_dir):
+            local_pages = frozenset(find_locally_built_pages(urls_by_page, args.build_dir, f"{base_url_for_links}/en/latest/"))
+            print(f"Found {len(local_pages)} of {len(urls_by_page)} pages in the local build at '{args.build_dir}'.")
+        else:
+            print(f"Warning: The build directory '{args.build_dir}' was not found. Checking all pages over HTTP.")
+
+    print(f"Found {len(unique_urls)} unique URLs across {len(urls_by_page)} pages. Checking their status. This may take a moment...")
     
     page_level_urls = []
     section_level_urls = []
     error_404_urls = []
 
     # Using ThreadPoolExecutor to check URLs concurrently for better performance
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        future_to_url = {executor.submit(check_url_status, url): url for url in unique_urls}
-        for future in concurrent.futures.as_completed(future_to_url):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_page = {executor.submit(check_url_status, page, local_pages): page for page in urls_by_page}
+        for pages_checked, future in enumerate(concurrent.futures.as_completed(future_to_page), start=1):
             try:
-                url, status = future.result()
-                if status == 'OK':
-                    if '#' in url:
-                        section_level_urls.append(url)
-                        print(f"[SECT OK] {url}")
+                page, status = future.result()
+                for url in urls_by_page[page]:
+                    if status == 'OK':
+                        if '#' in url:
+                            section_level_urls.append(url)
+                            if args.verbose:
+                                print(f"[SECT OK] {url}")
+                        else:
+                            page_level_urls.append(url)
+                            if args.verbose:
+                                print(f"[PAGE OK] {url}")
+                    elif status == '404 Not Found':
+                        error_404_urls.append(url)
+                        if args.verbose:
+                            print(f"[ 404  ] {url}")
                     else:
-                        page_level_urls.append(url)
-                        print(f"[PAGE OK] {url}")
-                elif status == '404 Not Found':
-                    error_404_urls.append(url)
-                    print(f"[ 404  ] {url}")
-                else:
-                    print(f"[ERROR ] {url} - {status}")
+                        # Errors are always shown; they are not saved to any output file
+                        print(f"[ERROR ] {url} - {status}")
             except Exception as exc:
-                print(f'{future_to_url[future]} generated an exception: {exc}')
+                print(f'{future_to_page[future]} generated an exception: {exc}')
+
+            if not args.verbose and (pages_checked % PROGRESS_INTERVAL == 0 or pages_checked == len(future_to_page)):
+                print(f"Checked {pages_checked}/{len(future_to_page)} pages...")
 
     # Sort the lists alphabetically
     page_level_urls.sort()
     section_level_urls.sort()
     error_404_urls.sort()
 
-    # Write the results to their respective files
-    with open("page_level_urls.txt", "w", encoding="utf-8") as f:
-        for url in page_level_urls:
-            f.write(url + "\n")
-            
-    with open("section_level_urls.txt", "w", encoding="utf-8") as f:
-        for url in section_level_urls:
-            f.write(url + "\n")
-            
-    with open("404_error_urls.txt", "w", encoding="utf-8") as f:
-        for url in error_404_urls:
-            f.write(url + "\n")
+    # Write the results to their respective files, one write per file
+    for filename, urls in (
+        ("page_level_urls.txt", page_level_urls),
+        ("section_level_urls.txt", section_level_urls),
+        ("404_error_urls.txt", error_404_urls),
+    ):
+        with open(filename, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+            if urls:
+                f.write("\n".join(urls) + "\n")
             
     print("\n--- Process Complete ---")
     print(f"Found {len(page_level_urls)} valid page-level URLs. Saved to page_level_urls.txt")